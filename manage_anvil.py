@@ -0,0 +1,357 @@
+import os
+import sys
+import json
+import mmap
+import time
+import signal
+import subprocess
+import http.client
+import inquirer
+from inquirer.themes import GreenPassion
+
+ANVIL_HOST = "127.0.0.1"
+ANVIL_PORT = 8545
+ANVIL_PID_FILE = "anvil.pid"
+ANVIL_STATE_FILE = "anvil_state.json"
+ANVIL_LOG_FILE = "anvil.log"
+
+# Upper bound for the mmap'd state dump. The region is pre-sized so the
+# response can be written without growing the file, then truncated back to
+# the exact byte count once the dump is complete.
+MAX_STATE_SIZE = 8 * 1024 ** 3  # 8 GiB
+
+# Cached existence of the PID file, so the menu loop does not stat() the
+# same path on every iteration. Only start_anvil/stop_anvil change the
+# file, and they update the cache accordingly.
+_PID_STATE = {"known": None}
+
+# The Popen handle for an anvil started in this session. Needed to reap
+# the child on stop: until it is wait()ed on, the exited process stays a
+# zombie and still answers kill(pid, 0).
+_ANVIL_PROC = None
+
+def _pid_exists() -> bool:
+    """Returns whether the PID file exists, hitting the disk at most once."""
+    if _PID_STATE["known"] is None:
+        _PID_STATE["known"] = os.path.exists(ANVIL_PID_FILE)
+    return _PID_STATE["known"]
+
+def mmap_read(path: str) -> mmap.mmap:
+    """
+    Memory-maps a file for reading with copy-on-write semantics.
+
+    ACCESS_COPY lets a parser read straight from the page cache without
+    any dirty-page write-back, which is the cheapest way to re-read the
+    genesis or state files once they grow to many megabytes. The caller
+    is responsible for closing the returned mapping.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        return mmap.mmap(fd, size, access=mmap.ACCESS_COPY)
+    finally:
+        # The mapping keeps its own reference to the file.
+        os.close(fd)
+
+def load_json(path: str):
+    """Parses a JSON file through a copy-on-write mmap (see mmap_read)."""
+    mm = mmap_read(path)
+    try:
+        return json.loads(mm[:])
+    finally:
+        mm.close()
+
+# A single keep-alive connection shared by every RPC call in the
+# session, created lazily so importing the module never touches the
+# network. Each new call must fully read the previous response first,
+# which rpc()'s callers (dump_state included) always do.
+_RPC_CONN = None
+
+def rpc(method: str, params: list | None = None) -> http.client.HTTPResponse:
+    """
+    Sends a JSON-RPC request to anvil over a persistent connection.
+
+    Reusing one connection avoids a TCP handshake (and, compared to the
+    old 'cast rpc' approach, a fork+exec) per call. If anvil restarted
+    since the last call, the stale connection is rebuilt and the request
+    retried once. Returns the HTTPResponse; the caller must read it to
+    the end before the connection can be reused.
+    """
+    global _RPC_CONN
+    payload = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []})
+    for attempt in (1, 2):
+        if _RPC_CONN is None:
+            _RPC_CONN = http.client.HTTPConnection(ANVIL_HOST, ANVIL_PORT, timeout=60)
+        try:
+            _RPC_CONN.request("POST", "/", payload, {"Content-Type": "application/json"})
+            return _RPC_CONN.getresponse()
+        except (OSError, http.client.HTTPException):
+            _RPC_CONN.close()
+            _RPC_CONN = None
+            if attempt == 2:
+                raise
+
+def _strip_rpc_envelope(mm: mmap.mmap, size: int) -> int:
+    """
+    Strips the JSON-RPC envelope in the mapped region in place, leaving
+    only the 'result' payload, and returns the payload length.
+
+    'anvil --load-state' expects the bare state payload (what the old
+    'cast rpc' pipeline printed), not the {"jsonrpc":...,"result":...}
+    envelope. The dump can be huge, so instead of parsing it the payload
+    is located structurally: everything between '"result":' and the
+    envelope's closing brace (anvil emits 'result' as the last member).
+    Raises ValueError if the response carries no result.
+    """
+    start = mm.find(b'"result":', 0, min(size, 4096))
+    if start < 0:
+        # Small error responses fit comfortably in the mapped head.
+        raise ValueError(f"anvil_dumpState returned no result: {mm[:min(size, 512)].decode(errors='replace')}")
+    start += len(b'"result":')
+    end = size
+    while end > start and mm[end - 1] in b" \t\r\n":
+        end -= 1
+    if end <= start or mm[end - 1] != ord("}"):
+        raise ValueError("anvil_dumpState response is truncated or malformed.")
+    end -= 1  # Drop the envelope's closing brace.
+    mm.move(0, start, end - start)
+    return end - start
+
+def dump_state():
+    """
+    Dumps the current anvil state into the state file via JSON-RPC.
+
+    The response body is streamed straight into a pre-sized mmap region
+    instead of going through a subprocess pipe, which avoids an extra
+    buffer copy and guarantees the full dump is flushed to disk before
+    the caller signals the node. The RPC envelope is stripped so the
+    file holds exactly what '--load-state' expects, and the file is
+    truncated to the exact payload length. A dump that fails part-way
+    removes the file so the next start cannot load garbage.
+    """
+    response = rpc("anvil_dumpState")
+
+    fd = os.open(ANVIL_STATE_FILE, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+    try:
+        try:
+            os.ftruncate(fd, MAX_STATE_SIZE)
+            mm = mmap.mmap(fd, MAX_STATE_SIZE)
+            try:
+                while True:
+                    chunk = response.read(1 << 20)
+                    if not chunk:
+                        break
+                    mm.write(chunk)
+                payload_len = _strip_rpc_envelope(mm, mm.tell())
+                mm.flush()
+                os.ftruncate(fd, payload_len)
+            finally:
+                mm.close()
+        except BaseException:
+            # Never leave a half-written (or still 8 GiB pre-sized) file
+            # behind: start_anvil's existence probe would happily feed it
+            # to --load-state.
+            os.ftruncate(fd, 0)
+            os.remove(ANVIL_STATE_FILE)
+            raise
+    finally:
+        os.close(fd)
+
+def start_anvil():
+    """Starts an anvil node in the background and records its PID."""
+    global _ANVIL_PROC
+    if _pid_exists():
+        print("Anvil appears to be running already (PID file found).")
+        return
+
+    command = ["anvil", "--host", ANVIL_HOST, "--port", str(ANVIL_PORT)]
+    # A single open() probe instead of exists() + anvil's own open(): it
+    # fails fast with ENOENT and costs one syscall instead of two.
+    try:
+        os.close(os.open(ANVIL_STATE_FILE, os.O_RDONLY))
+        print(f"Previous state found, loading '{ANVIL_STATE_FILE}'.")
+        command.extend(["--load-state", ANVIL_STATE_FILE])
+    except FileNotFoundError:
+        pass
+
+    # Open the PID file before spawning so registering the child is a
+    # single os.write once Popen returns, with no second open() in
+    # between. A PID fits in a handful of bytes; a raw fd write needs
+    # none of the buffered text-IO machinery.
+    pid_fd = os.open(ANVIL_PID_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+    try:
+        log_file = open(ANVIL_LOG_FILE, "a")
+        process = subprocess.Popen(
+            command,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            # start_new_session gives the same setsid() behaviour as a
+            # preexec_fn, but without forcing subprocess onto the slow
+            # fork path: with no preexec_fn CPython can use posix_spawn.
+            start_new_session=True,
+        )
+    except FileNotFoundError:
+        os.close(pid_fd)
+        os.remove(ANVIL_PID_FILE)
+        print("Error: 'anvil' was not found. Install Foundry first (https://getfoundry.sh).")
+        return
+    except (OSError, subprocess.SubprocessError) as e:
+        # Any other spawn failure (e.g. a non-executable binary) must
+        # also clean up the pre-opened PID file, or the next session
+        # would mistake the empty leftover for a running anvil.
+        os.close(pid_fd)
+        os.remove(ANVIL_PID_FILE)
+        print(f"Error: could not start anvil: {e}")
+        return
+
+    try:
+        os.write(pid_fd, str(process.pid).encode())
+    finally:
+        os.close(pid_fd)
+    _ANVIL_PROC = process
+    _PID_STATE["known"] = True
+    print(f"Anvil started with PID {process.pid}. Logs go to '{ANVIL_LOG_FILE}'.")
+
+def stop_anvil():
+    """Dumps the anvil state to disk and then stops the node."""
+    global _ANVIL_PROC
+    if not _pid_exists():
+        print("Anvil does not appear to be running (no PID file).")
+        return
+
+    try:
+        with open(ANVIL_PID_FILE) as f:
+            pid = int(f.read().strip())
+    except (ValueError, FileNotFoundError):
+        # An empty or garbled PID file is a leftover from a failed
+        # start; drop it instead of tracebacking out of the menu.
+        print("Stale PID file found, removing it.")
+        try:
+            os.remove(ANVIL_PID_FILE)
+        except FileNotFoundError:
+            pass
+        _PID_STATE["known"] = False
+        return
+
+    print(f"Dumping state to '{ANVIL_STATE_FILE}'...")
+    try:
+        dump_state()
+        print("State dumped successfully.")
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        print(f"Warning: could not dump the anvil state: {e}")
+
+    # The dump is fully on disk at this point, so it is safe to signal.
+    print(f"Stopping anvil (PID {pid})...")
+    try:
+        os.kill(pid, signal.SIGTERM)
+        if _ANVIL_PROC is not None and _ANVIL_PROC.pid == pid:
+            # Our own child: it must be reaped with wait(), otherwise it
+            # lingers as a zombie and kill(pid, 0) keeps succeeding no
+            # matter how quickly it exited.
+            try:
+                _ANVIL_PROC.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                print("Anvil did not exit in time, sending SIGKILL.")
+                _ANVIL_PROC.kill()
+                _ANVIL_PROC.wait()
+            _ANVIL_PROC = None
+        else:
+            # Started by an earlier session, so not our child; polling
+            # the PID is the only option. Returns as soon as the process
+            # is gone, escalating to SIGKILL after ~2 s.
+            for _ in range(40):
+                try:
+                    os.kill(pid, 0)
+                except ProcessLookupError:
+                    break
+                time.sleep(0.05)
+            else:
+                print("Anvil did not exit in time, sending SIGKILL.")
+                os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        print("The anvil process was already gone.")
+
+    os.remove(ANVIL_PID_FILE)
+    _PID_STATE["known"] = False
+    print("Anvil stopped.")
+
+def view_logs():
+    """
+    Follows the anvil log file in-process (Ctrl+C to return to the menu).
+
+    Instead of spawning 'tail -f' (or PowerShell on Windows), the file is
+    memory-mapped and new bytes are read straight from the page cache
+    whenever its size grows, so following the log costs no subprocess and
+    no extra buffer copies.
+    """
+    try:
+        fd = os.open(ANVIL_LOG_FILE, os.O_RDONLY)
+    except FileNotFoundError:
+        print(f"Log file '{ANVIL_LOG_FILE}' not found. Start anvil first.")
+        return
+
+    print(f"Following '{ANVIL_LOG_FILE}' (Ctrl+C to stop)...")
+    last_off = os.fstat(fd).st_size
+    try:
+        while True:
+            size = os.fstat(fd).st_size
+            if size < last_off:
+                # The file was truncated (e.g. a fresh anvil run); start
+                # over from the beginning.
+                last_off = 0
+            if size > last_off:
+                mm = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+                try:
+                    sys.stdout.buffer.write(mm[last_off:size])
+                    sys.stdout.buffer.flush()
+                finally:
+                    mm.close()
+                last_off = size
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        os.close(fd)
+
+# The theme and choices are built once and shared across menu
+# iterations; the question itself is only rebuilt when the status line
+# changes, because inquirer.List.message is a read-only property and
+# cannot be mutated in place.
+_THEME = GreenPassion()
+_MENU_CHOICES = [
+    "Start Anvil",
+    "Stop Anvil (dump state)",
+    "View Logs",
+    "Exit",
+]
+
+def main_menu():
+    """Displays the main menu and handles user selection."""
+    last_status = None
+    questions = None
+    while True:
+        status = "running" if _pid_exists() else "stopped"
+        if status != last_status:
+            questions = [
+                inquirer.List(
+                    "action",
+                    message=f"Anvil Manager | Status: {status}",
+                    choices=_MENU_CHOICES,
+                    carousel=True,
+                )
+            ]
+            last_status = status
+        answer = inquirer.prompt(questions, theme=_THEME)
+
+        if answer is None or answer["action"] == "Exit":
+            print("Exiting...")
+            break
+        elif answer["action"] == "Start Anvil":
+            start_anvil()
+        elif answer["action"] == "Stop Anvil (dump state)":
+            stop_anvil()
+        elif answer["action"] == "View Logs":
+            view_logs()
+
+if __name__ == "__main__":
+    main_menu()
@@ -1,5 +1,8 @@
 import os
+import re
 import json
+import mmap
+import signal
 import subprocess
 import questionary
 import shutil
@@ -12,6 +15,23 @@ GENESIS_FILE = "genesis.json"
 PASSWORD_FILE = "password.txt"
 LOG_FILE = os.path.join(DATA_DIR, "geth.log") # We assume the log file will be inside the data directory.
 
+# Cheap shape check for an Ethereum address, so obviously malformed input
+# is rejected before paying for the keccak-256 checksum computation.
+_ADDR_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+_WEI_PER_ETH = Decimal("1e18")
+
+# Compact encoder for genesis.json. Note that calling iterencode() on a
+# JSONEncoder runs the pure-Python encoding path (the C accelerator is
+# one-shot only), so streaming trades encoder speed for O(chunk) peak
+# memory — worth it only once the alloc section is genuinely large.
+_GENESIS_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+# Above this many alloc entries the transient output string from
+# json.dumps matters more than the C encoder's speed, so the document
+# is streamed instead.
+_STREAM_ALLOC_THRESHOLD = 10_000
+
 def eth_to_wei(eth_str: str) -> str | None:
     """
     Safely converts an ETH amount (as a string) to Wei using Decimal to avoid precision issues.
@@ -20,7 +40,7 @@ def eth_to_wei(eth_str: str) -> str | None:
     try:
         # Use Decimal instead of float to handle monetary values and avoid precision errors.
         eth_decimal = Decimal(eth_str)
-        wei_decimal = eth_decimal * Decimal("1e18")
+        wei_decimal = eth_decimal * _WEI_PER_ETH
         # Format the Decimal as a plain, non-scientific string. The '.0f' specifier
         # ensures a fixed-point representation with zero decimal places, which is
         # the most reliable way to prevent scientific notation for Geth.
@@ -31,15 +51,21 @@ def eth_to_wei(eth_str: str) -> str | None:
 
 def ask_alloc() -> dict:
     """Prompts the user for addresses and their initial balances."""
-    alloc = {}
+    entries = []
     print("Enter the accounts for the genesis.json file. Leave the address blank to finish.")
     while True:
         address = questionary.text("Ethereum Address:").ask()
         if not address:
             break
-        
+
+        # Reject malformed addresses with a regex before running the
+        # (comparatively expensive) checksum normalization.
+        if not _ADDR_RE.match(address):
+            print("Error: Invalid Ethereum address. It must start with 0x and be 42 characters long.")
+            continue
+
         try:
-            # Validate and normalize the address to checksum format.
+            # Normalize the address to checksum format.
             # to_checksum_address will raise a ValueError if the address is invalid.
             checksum_address = to_checksum_address(address)
         except ValueError:
@@ -48,11 +74,12 @@ def ask_alloc() -> dict:
 
         balance_eth_str = questionary.text(f"Initial balance in ETH for {checksum_address}:").ask()
         balance_wei = eth_to_wei(balance_eth_str)
-        
+
         if balance_wei is not None:
-            alloc[checksum_address] = {"balance": balance_wei}
-            
-    return alloc
+            entries.append((checksum_address, {"balance": balance_wei}))
+
+    # Build the dict in one go instead of resizing it entry by entry.
+    return dict(entries)
 
 def write_genesis(alloc: dict):
     """Writes the allocation dictionary to the genesis.json file."""
@@ -77,7 +104,16 @@ def write_genesis(alloc: dict):
     }
     try:
         with open(GENESIS_FILE, "w") as f:
-            json.dump(genesis, f, indent=4)
+            # Compact separators and no indent: Geth does not care about
+            # whitespace, and pretty-printing a large alloc section both
+            # bloats the file and forces json onto its slow pure-Python
+            # encoding path. Typical allocs go through json.dumps to
+            # keep the C encoder; huge ones are streamed so the whole
+            # document never exists as one string.
+            if len(alloc) >= _STREAM_ALLOC_THRESHOLD:
+                f.writelines(_GENESIS_ENCODER.iterencode(genesis))
+            else:
+                f.write(json.dumps(genesis, separators=(",", ":")))
         print(f"File '{GENESIS_FILE}' created successfully.")
     except IOError as e:
         print(f"Error writing to '{GENESIS_FILE}': {e}")
@@ -90,8 +126,14 @@ def write_password():
     
     pw = questionary.password("Enter the password for the new account:").ask()
     try:
-        with open(PASSWORD_FILE, "w") as f:
-            f.write(pw)
+        # A raw fd write skips the buffered text-IO stack for a tiny
+        # file, and creating it with mode 0o600 keeps the password from
+        # ever being world-readable, regardless of umask.
+        fd = os.open(PASSWORD_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o600)
+        try:
+            os.write(fd, pw.encode())
+        finally:
+            os.close(fd)
         print(f"File '{PASSWORD_FILE}' created successfully.")
     except IOError as e:
         print(f"Error writing to '{PASSWORD_FILE}': {e}")
@@ -117,33 +159,89 @@ def start_node():
     # Note: 'bash' assumes a Unix-like environment (Linux, macOS, WSL on Windows).
     subprocess.run(["bash", "./start-node.sh"])
 
+def _kill_geth_procfs() -> bool:
+    """
+    Scans /proc for running 'geth' processes and sends them SIGTERM.
+    Returns True if at least one process was signaled.
+    """
+    killed = False
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/comm") as f:
+                if f.read().strip() == "geth":
+                    os.kill(int(pid), signal.SIGTERM)
+                    killed = True
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            # The process exited mid-scan or belongs to another user.
+            continue
+    return killed
+
 def restart_node():
     """Stops any running Geth process and restarts it."""
     print("Attempting to restart the node...")
-    try:
-        # pkill is effective but specific to Unix/Linux/macOS.
-        # A platform check could be added here if needed.
-        subprocess.run(["pkill", "geth"], check=True, capture_output=True)
-        print(" Geth process stopped.")
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("No running Geth process was found.")
-    
+    if os.path.isdir("/proc"):
+        # Scanning /proc ourselves avoids fork+exec'ing pkill for what is
+        # a simple name lookup, and works even where pkill is missing.
+        if _kill_geth_procfs():
+            print(" Geth process stopped.")
+        else:
+            print("No running Geth process was found.")
+    else:
+        try:
+            # No procfs (e.g. macOS): fall back to pkill.
+            subprocess.run(["pkill", "geth"], check=True, capture_output=True)
+            print(" Geth process stopped.")
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            print("No running Geth process was found.")
+
     start_node()
 
+def _tail_lines(path: str, num_lines: int) -> str:
+    """
+    Returns the last N lines of a file without reading the whole thing.
+
+    Memory-maps a bounded window at the end of the file and scans it for
+    line breaks, doubling the window until enough lines are found. This
+    keeps the cost proportional to the lines printed instead of the file
+    size, which matters once the Geth log grows large.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return ""
+        window = 64 * 1024
+        while True:
+            # The mmap offset must be aligned to the allocation granularity.
+            offset = max(size - window, 0) & ~(mmap.ALLOCATIONGRANULARITY - 1)
+            mm = mmap.mmap(fd, size - offset, offset=offset, access=mmap.ACCESS_READ)
+            try:
+                data = mm[:]
+            finally:
+                mm.close()
+            lines = data.split(b"\n")
+            if data.endswith(b"\n"):
+                lines.pop()
+            # Unless we reached the start of the file, the first line in
+            # the window may be cut off, so demand one extra line.
+            if offset == 0 or len(lines) > num_lines:
+                return b"\n".join(lines[-num_lines:]).decode(errors="replace")
+            window *= 2
+    finally:
+        os.close(fd)
+
 def view_logs(num_lines: int = 20):
     """
     Displays the last N lines of the Geth log file.
     """
     print(f"Displaying the last {num_lines} lines of '{LOG_FILE}'...")
     try:
-        with open(LOG_FILE, 'r') as f:
-            # Read all lines from the file.
-            lines = f.readlines()
-            # Join and print only the last N lines.
-            last_lines = "".join(lines[-num_lines:])
-            print("-" * 50)
-            print(last_lines.strip())
-            print("-" * 50)
+        last_lines = _tail_lines(LOG_FILE, num_lines)
+        print("-" * 50)
+        print(last_lines.strip())
+        print("-" * 50)
     except FileNotFoundError:
         print(f"Log file '{LOG_FILE}' not found.")
         print("Please ensure Geth is running and your 'start-node.sh' script is configured to write to that file.")
@@ -152,20 +250,21 @@ def view_logs(num_lines: int = 20):
         print(f"An unexpected error occurred while reading the log file: {e}")
 
 
+# Built once and shared across menu iterations instead of re-allocating
+# the list on every pass through the loop.
+_MENU_CHOICES = [
+    "Generate genesis.json and password.txt",
+    "Start Node",
+    "Restart Node",
+    "View Latest Logs",
+    "Delete Data and Reset",
+    "Exit"
+]
+
 def main_menu():
     """Displays the main menu and handles user selection."""
     while True:
-        choice = questionary.select(
-            "Main Menu:",
-            choices=[
-                "Generate genesis.json and password.txt",
-                "Start Node",
-                "Restart Node",
-                "View Latest Logs",
-                "Delete Data and Reset",
-                "Exit"
-            ]
-        ).ask()
+        choice = questionary.select("Main Menu:", choices=_MENU_CHOICES).ask()
 
         if choice is None:
             print("\nExiting...")